@@ -4,91 +4,897 @@ Handles interview preparation using LangChain and OpenAI
 """
 
 import os
-from typing import List, Dict
-from langchain_community.chat_models import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+import re
+import time
+import atexit
+import asyncio
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import httpx
+import ijson
+import numpy as np
+import orjson
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Generated question sets are reused for a day before being regenerated
+QUESTION_CACHE_TTL = 86400
+
+# Embedding model used to match near-duplicate topics
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIM = 1536
+
+# Interview instructions shared by every request. Kept free of the topic and level,
+# which go in the human message, so the system prompt is identical across calls.
+SYSTEM_PROMPT_STATIC = """You are an expert technical interviewer. Generate exactly 5 interview questions about the topic in the user's message.
+
+For each question, provide:
+1. A clear, specific question that tests deep understanding
+2. A concise but comprehensive answer (2-3 sentences)
+3. The difficulty level requested by the user (Beginner, Intermediate or Advanced)
+
+Format your response as a JSON object with a "questions" array where each object has:
+- "question": the interview question
+- "answer": the answer
+- "difficulty": the difficulty level
+
+Make sure the questions are practical and relevant to real-world scenarios in the topic."""
+
+# Per-request instructions; the topic and level are filled in by _build_messages
+HUMAN_PROMPT_TEMPLATE = (
+    "Topic: {topic}\nDifficulty: {levels}\n"
+    "Generate exactly 5 {level} interview questions about this topic with clear, concise answers."
+)
+
+# Shared HTTP client so OpenAI calls reuse warm keep-alive TLS connections. Every
+# OpenAI call is async, and pooled connections are bound to the event loop that
+# opened them, so all calls run on one long-lived background loop instead of the
+# per-request loops Flask creates.
+_HTTP_ASYNC = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=2000, max_keepalive_connections=1500),
+    timeout=120,
+    http2=True
+)
+_LLM_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LLM_LOOP_LOCK = threading.Lock()
+
+# Cap on in-flight OpenAI requests so bursts stay under the account's rate limits
+_LLM_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "50"))
+_LLM_SEM: Optional[asyncio.Semaphore] = None
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """Whether an OpenAI failure is transient and worth retrying with backoff"""
+    # openai is slow to import and already loaded by the time a call fails
+    import openai
+    # Timeouts are connection errors
+    return isinstance(error, (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError))
+
+
+# Backoff policy shared by buffered calls and by opening a streamed reply
+_LLM_RETRY = retry(
+    retry=retry_if_exception(_is_retryable),
+    wait=wait_exponential_jitter(initial=1, max=30),
+    stop=stop_after_attempt(5),
+    reraise=True
+)
+
+
+def _get_llm_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared background event loop, starting it on first use"""
+    global _LLM_LOOP
+    with _LLM_LOOP_LOCK:
+        if _LLM_LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+            _LLM_LOOP = loop
+    return _LLM_LOOP
+
+
+def _run_on_llm_loop(coro):
+    """Run a coroutine on the shared event loop and block until it finishes"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_llm_loop()).result()
+
+
+def _get_llm_semaphore() -> asyncio.Semaphore:
+    """Return the OpenAI concurrency limiter, created on the shared loop that uses it"""
+    global _LLM_SEM
+    if _LLM_SEM is None:
+        _LLM_SEM = asyncio.Semaphore(_LLM_MAX_CONCURRENCY)
+    return _LLM_SEM
+
+
+async def _await_on_llm_loop(coro):
+    """Await a coroutine on the shared event loop from any other event loop"""
+    loop = _get_llm_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def prewarm_openai_connection():
+    """
+    Open the keep-alive connection to the OpenAI API ahead of the first real request
+    
+    The async client speaks HTTP/2, so every OpenAI call multiplexes over a
+    single connection; one request is enough to pay the TCP/TLS handshake up
+    front. It runs on the shared event loop in the background, so the
+    connection it opens is the one later OpenAI calls reuse.
+    
+    Returns:
+        Optional[concurrent.futures.Future]: Completes when warmup finishes, None if skipped
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key or os.getenv("OPENAI_PREWARM", "1").lower() in ("0", "false"):
+        return None
+    
+    base_url = (os.getenv("OPENAI_BASE_URL") or "https://api.openai.com/v1").rstrip("/")
+    
+    async def warm():
+        start = time.perf_counter()
+        try:
+            await _HTTP_ASYNC.head(f"{base_url}/models", headers={"Authorization": f"Bearer {api_key}"})
+        except Exception as e:
+            print(f"Error pre-warming OpenAI connection: {e}")
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"Pre-warmed OpenAI connection in {elapsed_ms:.0f} ms")
+    
+    return asyncio.run_coroutine_threadsafe(warm(), _get_llm_loop())
+
+
+@atexit.register
+def _close_async_http():
+    """Close the async HTTP client on the loop that owns its connections"""
+    if _LLM_LOOP is not None and _LLM_LOOP.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(_HTTP_ASYNC.aclose(), _LLM_LOOP).result(timeout=5)
+        except Exception as e:
+            print(f"Error closing async HTTP client: {e}")
+
+
+# Generic questions served when generation fails; {topic} is filled in per topic
+_FALLBACK_TEMPLATE: Tuple[Dict[str, str], ...] = (
+    {
+        "question": "What are the key concepts and principles in {topic}?",
+        "answer": "The key concepts in {topic} include fundamental principles, best practices, and core methodologies that form the foundation of this field.",
+        "difficulty": "Intermediate"
+    },
+    {
+        "question": "How would you explain {topic} to someone with no technical background?",
+        "answer": "I would use analogies and simple language to explain {topic}, focusing on practical benefits and real-world applications.",
+        "difficulty": "Intermediate"
+    },
+    {
+        "question": "What are the most common challenges when working with {topic}?",
+        "answer": "Common challenges include complexity management, performance optimization, and maintaining code quality while scaling applications.",
+        "difficulty": "Advanced"
+    },
+    {
+        "question": "Can you describe a real-world project where you applied {topic}?",
+        "answer": "In a real-world project, I would apply {topic} by identifying specific use cases, implementing best practices, and measuring success through key metrics.",
+        "difficulty": "Advanced"
+    },
+    {
+        "question": "What resources would you recommend for someone learning {topic}?",
+        "answer": "I recommend official documentation, hands-on projects, online courses, and community forums for comprehensive learning of {topic}.",
+        "difficulty": "Intermediate"
+    }
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _fallback_questions(topic: str) -> Tuple[Dict[str, str], ...]:
+    """Fill the fallback template for a topic, once per recently failed topic"""
+    return tuple(
+        {key: value.format(topic=topic) for key, value in question.items()}
+        for question in _FALLBACK_TEMPLATE
+    )
+
+
+class LLMCache:
+    """Exact-match response cache for LLM calls, in memory with an optional Redis backend"""
+    
+    def __init__(self, max_entries: int = 512, redis_url: Optional[str] = None):
+        """
+        Initialize the cache
+        
+        Args:
+            max_entries (int): Maximum number of entries kept in process memory
+            redis_url (str): Optional Redis URL used as a shared second-level cache
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.redis = None
+        
+        if redis_url:
+            try:
+                import redis
+                # Bounded timeouts so an unreachable Redis can't tie up worker threads indefinitely
+                self.redis = redis.Redis.from_url(redis_url, socket_timeout=2.0, socket_connect_timeout=2.0)
+            except ImportError:
+                print("WARNING: REDIS_URL is set but the redis package is not installed; using memory cache only")
+    
+    @staticmethod
+    def make_key(**parts) -> str:
+        """Build a stable cache key from the parts that determine an LLM response"""
+        payload = orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(payload).hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value
+        
+        Args:
+            key (str): Cache key from make_key()
+            
+        Returns:
+            Optional[Any]: Cached value if present and not expired, None otherwise
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+        
+        if self.redis is not None:
+            try:
+                pipe = self.redis.pipeline()
+                pipe.get(self._redis_key(key))
+                pipe.ttl(self._redis_key(key))
+                raw, ttl = pipe.execute()
+                if raw is not None:
+                    value = orjson.loads(raw)
+                    self._store_local(key, value, ttl if ttl and ttl > 0 else QUESTION_CACHE_TTL)
+                    with self._lock:
+                        self.hits += 1
+                    return value
+            except Exception as e:
+                print(f"Error reading from Redis cache: {e}")
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def set(self, key: str, value: Any, ttl: int = QUESTION_CACHE_TTL):
+        """
+        Store a value in the cache
+        
+        Args:
+            key (str): Cache key from make_key()
+            value (Any): JSON-serializable value to cache
+            ttl (int): Time to live in seconds
+        """
+        self._store_local(key, value, ttl)
+        
+        if self.redis is not None:
+            try:
+                self.redis.set(self._redis_key(key), orjson.dumps(value), ex=ttl)
+            except Exception as e:
+                print(f"Error writing to Redis cache: {e}")
+    
+    def stats(self) -> Dict:
+        """Return hit/miss counters for observability"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._entries),
+                "backend": "redis" if self.redis is not None else "memory"
+            }
+    
+    def _store_local(self, key: str, value: Any, ttl: int):
+        """Store a value in process memory, evicting the least recently used entry"""
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return f"smartlife:llm:{key}"
+
+
+class SemanticCache:
+    """
+    Embedding-based cache that maps semantically similar topics to one result
+    
+    New entries start in a small in-process probation pool and are only
+    promoted to the main index (Redis HNSW when available) once a second,
+    similar topic hits them, so one-off queries never pollute the index.
+    Entries are partitioned by namespace so that, for example, beginner
+    and advanced question sets for the same topic never match each other.
+    """
+    
+    INDEX_NAME = "smartlife:topics"
+    KEY_PREFIX = "smartlife:topic:"
+    
+    def __init__(self, embeddings, redis_client=None, threshold: float = 0.92,
+                 max_entries: int = 1024, probation_size: int = 128):
+        """
+        Initialize the semantic cache
+        
+        Args:
+            embeddings: LangChain embeddings model used to embed topics
+            redis_client: Optional Redis client with RediSearch for the main index
+            threshold (float): Minimum cosine similarity for a cache hit
+            max_entries (int): Maximum entries in the in-memory main index
+            probation_size (int): Maximum entries waiting for a second hit
+        """
+        self.embeddings = embeddings
+        self.redis = redis_client
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.probation_size = probation_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[str, np.ndarray, Any]]" = OrderedDict()
+        self._probation: "OrderedDict[str, Tuple[str, np.ndarray, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        if self.redis is not None:
+            self._create_index()
+    
+    @staticmethod
+    def normalize(topic: str) -> str:
+        """Normalize a topic so trivial spelling variations embed identically"""
+        return re.sub(r"\s+", " ", topic).strip().lower()
+    
+    async def aembed(self, topic: str) -> Optional[np.ndarray]:
+        """
+        Embed a normalized topic
+        
+        Returns:
+            Optional[np.ndarray]: Unit-length float32 embedding, None if embedding failed
+        """
+        try:
+            vector = np.asarray(await self.embeddings.aembed_query(self.normalize(topic)), dtype=np.float32)
+        except Exception as e:
+            print(f"Error embedding topic for semantic cache: {e}")
+            return None
+        
+        return vector / (float(np.linalg.norm(vector)) or 1.0)
+    
+    def get(self, vector: np.ndarray, namespace: str = "default") -> Optional[Any]:
+        """
+        Find the cached value of the most similar topic
+        
+        Args:
+            vector (np.ndarray): Embedding from aembed()
+            namespace (str): Partition to search in
+            
+        Returns:
+            Optional[Any]: Cached value if a topic is similar enough, None otherwise
+        """
+        value = self._search_index(vector, namespace)
+        
+        if value is None:
+            with self._lock:
+                key, value = self._nearest(self._probation, vector, namespace)
+                if value is not None:
+                    # A second similar topic arrived, so the entry has earned a place in the index
+                    _, promoted_vector, _ = self._probation.pop(key)
+            if value is not None:
+                self._add_to_index(key, namespace, promoted_vector, value)
+        
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+    
+    def set(self, topic: str, vector: np.ndarray, value: Any, namespace: str = "default"):
+        """
+        Admit a freshly generated value into the probation pool
+        
+        Args:
+            topic (str): Topic the value was generated for
+            vector (np.ndarray): Embedding from aembed()
+            value (Any): JSON-serializable value to cache
+            namespace (str): Partition to store the value in
+        """
+        key = f"{namespace}:{self.normalize(topic)}"
+        with self._lock:
+            self._probation[key] = (namespace, vector, value)
+            self._probation.move_to_end(key)
+            while len(self._probation) > self.probation_size:
+                self._probation.popitem(last=False)
+    
+    def stats(self) -> Dict:
+        """Return hit/miss counters for observability"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._entries),
+                "probation": len(self._probation),
+                "backend": "redis" if self.redis is not None else "memory"
+            }
+    
+    def _nearest(self, entries: "OrderedDict[str, Tuple[str, np.ndarray, Any]]",
+                 vector: np.ndarray, namespace: str) -> Tuple[Optional[str], Optional[Any]]:
+        """Brute-force cosine search over unit vectors held in memory, as one matrix product"""
+        keys = [key for key, (entry_namespace, _, _) in entries.items() if entry_namespace == namespace]
+        if not keys:
+            return None, None
+        
+        scores = np.stack([entries[key][1] for key in keys]) @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None, None
+        return keys[best], entries[keys[best]][2]
+    
+    def _search_index(self, vector: np.ndarray, namespace: str) -> Optional[Any]:
+        """Search the main index for a topic within the similarity threshold"""
+        if self.redis is not None:
+            try:
+                result = self.redis.execute_command(
+                    "FT.SEARCH", self.INDEX_NAME,
+                    f"(@namespace:{{{namespace}}})=>[KNN 1 @embedding $vec AS score]",
+                    "PARAMS", "2", "vec", vector.tobytes(),
+                    "SORTBY", "score",
+                    "RETURN", "2", "score", "questions",
+                    "DIALECT", "2"
+                )
+                if result and result[0]:
+                    fields = dict(zip(result[2][::2], result[2][1::2]))
+                    # Cosine distance, so 1 - distance is the similarity
+                    if 1 - float(fields[b"score"]) >= self.threshold:
+                        return orjson.loads(fields[b"questions"])
+            except Exception as e:
+                print(f"Error searching semantic cache: {e}")
+            return None
+        
+        with self._lock:
+            key, value = self._nearest(self._entries, vector, namespace)
+            if key is not None:
+                self._entries.move_to_end(key)
+            return value
+    
+    def _add_to_index(self, key: str, namespace: str, vector: np.ndarray, value: Any):
+        """Store a promoted entry in the main index"""
+        if self.redis is not None:
+            redis_key = self.KEY_PREFIX + hashlib.sha256(key.encode("utf-8")).hexdigest()
+            try:
+                # Expire like the exact-match cache; RediSearch drops expired hashes from the index
+                pipe = self.redis.pipeline()
+                pipe.hset(redis_key, mapping={
+                    "topic": key,
+                    "namespace": namespace,
+                    "questions": orjson.dumps(value),
+                    "embedding": vector.tobytes()
+                })
+                pipe.expire(redis_key, QUESTION_CACHE_TTL)
+                pipe.execute()
+            except Exception as e:
+                print(f"Error writing to semantic cache: {e}")
+            return
+        
+        with self._lock:
+            self._entries[key] = (namespace, vector, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def _create_index(self):
+        """Create the RediSearch HNSW index, falling back to memory if unavailable"""
+        try:
+            self.redis.execute_command(
+                "FT.CREATE", self.INDEX_NAME,
+                "ON", "HASH", "PREFIX", "1", self.KEY_PREFIX,
+                "SCHEMA",
+                "topic", "TEXT",
+                "namespace", "TAG",
+                "questions", "TEXT", "NOINDEX",
+                "embedding", "VECTOR", "HNSW", "6",
+                "TYPE", "FLOAT32", "DIM", str(EMBEDDING_DIM), "DISTANCE_METRIC", "COSINE"
+            )
+        except Exception as e:
+            if "Index already exists" not in str(e):
+                print(f"WARNING: Redis search index unavailable, using memory semantic cache: {e}")
+                self.redis = None
+
 
 class InterviewAI:
     """AI-powered interview preparation using LangChain and OpenAI"""
     
     def __init__(self):
         """Initialize the AI interview assistant"""
+        # LangChain is slow to import, so load it only when the assistant is first needed
+        from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+        
         self.api_key = os.getenv("OPENAI_API_KEY")
         
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
         
+        # Pinned snapshot so replies (and cached results) don't shift when the alias moves
+        self.model_name = "gpt-3.5-turbo-0125"
+        # Deterministic sampling so identical requests produce (and can reuse) identical answers;
+        # a fresh set is requested by moving to the next seed for that topic, and sampled
+        # with some randomness since greedy decoding ignores the seed
+        self.temperature = 0
+        self.fresh_temperature = 0.7
+        self.seed = 42
+        self._seed_offsets: Dict[str, int] = {}
+        self._seed_lock = threading.Lock()
+        
+        # Prompt tokens sent vs. served from OpenAI's prompt cache, to verify prefix hits
+        self._prompt_tokens = 0
+        self._cached_prompt_tokens = 0
+        self._usage_lock = threading.Lock()
+        
         # Initialize ChatOpenAI with GPT-3.5-turbo for cost efficiency
         self.llm = ChatOpenAI(
             openai_api_key=self.api_key,
-            model_name="gpt-3.5-turbo",
-            temperature=0.7,
-            max_tokens=1000
+            model_name=self.model_name,
+            temperature=self.temperature,
+            # Five short Q&A pairs fit in ~450 tokens; a tight cap keeps replies from rambling
+            max_tokens=550,
+            # JSON mode returns a bare JSON object; only a reply cut off by max_tokens can fail to parse
+            model_kwargs={"response_format": {"type": "json_object"}},
+            # Retries are handled by _ainvoke_llm so they back off outside the concurrency limit
+            max_retries=0,
+            # Report token usage on streamed replies too, for the prompt cache counters
+            stream_usage=True,
+            http_async_client=_HTTP_ASYNC
+        )
+        
+        # Semantic cache entries are partitioned by model and prompt, so changing either
+        # never serves questions generated under the old settings
+        self._prompt_version = hashlib.sha256(orjson.dumps(
+            [self.model_name, self.temperature, SYSTEM_PROMPT_STATIC, HUMAN_PROMPT_TEMPLATE]
+        )).hexdigest()[:12]
+        
+        # Repeat topics are served from cache instead of calling OpenAI again
+        self.cache = LLMCache(redis_url=os.getenv("REDIS_URL"))
+        
+        # Near-duplicate topics ("Java OOP" vs "OOPs Java") share one cached result
+        self.semantic_cache = SemanticCache(
+            OpenAIEmbeddings(
+                model=EMBEDDING_MODEL,
+                openai_api_key=self.api_key,
+                # Topics are short, so skip tiktoken chunking
+                check_embedding_ctx_length=False,
+                http_async_client=_HTTP_ASYNC
+            ),
+            redis_client=self.cache.redis,
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
         )
     
-    def generate_interview_questions(self, topic: str) -> List[Dict]:
+    def cache_stats(self) -> Dict:
+        """Return hit/miss counters of both cache layers and OpenAI's prompt cache"""
+        with self._usage_lock:
+            prompt_cache = {
+                "prompt_tokens": self._prompt_tokens,
+                "cached_tokens": self._cached_prompt_tokens,
+                "hit_rate": round(self._cached_prompt_tokens / self._prompt_tokens, 4) if self._prompt_tokens else 0.0
+            }
+        return {
+            "exact": self.cache.stats(),
+            "semantic": self.semantic_cache.stats(),
+            "prompt_cache": prompt_cache
+        }
+    
+    def generate_interview_questions(self, topic: str, fresh: bool = False) -> List[Dict]:
         """
         Generate 5 advanced interview questions for a given topic
         
         Args:
             topic (str): The topic to generate questions for (e.g., "Java OOP", "Machine Learning")
+            fresh (bool): Generate a new set instead of the cached one for this topic
             
         Returns:
             List[Dict]: List of 5 interview questions with answers
         """
-        try:
-            # System prompt to guide the AI
-            system_prompt = f"""You are an expert technical interviewer. Generate exactly 5 advanced interview questions about {topic}.
-            
-            For each question, provide:
-            1. A clear, specific question that tests deep understanding
-            2. A concise but comprehensive answer (2-3 sentences)
-            3. The difficulty level (Intermediate/Advanced)
+        return _run_on_llm_loop(self._agenerate_interview_questions(topic, fresh=fresh))
+    
+    async def agenerate_interview_questions(self, topic: str, fresh: bool = False) -> List[Dict]:
+        """
+        Async version of generate_interview_questions, safe to await from any event loop
+        
+        Args:
+            topic (str): The topic to generate questions for
+            fresh (bool): Generate a new set instead of the cached one for this topic
             
-            Format your response as a JSON array where each object has:
-            - "question": the interview question
-            - "answer": the answer
-            - "difficulty": the difficulty level
+        Returns:
+            List[Dict]: List of 5 interview questions with answers
+        """
+        return await _await_on_llm_loop(self._agenerate_interview_questions(topic, fresh=fresh))
+    
+    def stream_interview_questions(self, topic: str, fresh: bool = False) -> Iterator[Dict]:
+        """
+        Stream interview questions one by one as the model generates them
+        
+        Args:
+            topic (str): The topic to generate questions for
+            fresh (bool): Generate a new set instead of the cached one for this topic
             
-            Make sure the questions are practical and relevant to real-world scenarios in {topic}."""
+        Returns:
+            Iterator[Dict]: Questions in generation order, available before the full reply arrives
+        """
+        stream = self._astream_interview_questions(topic, fresh=fresh)
+        try:
+            while True:
+                try:
+                    yield _run_on_llm_loop(stream.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            _run_on_llm_loop(stream.aclose())
+    
+    async def agenerate_many(self, topics: List[str]) -> List[List[Dict]]:
+        """
+        Generate interview questions for several topics concurrently
+        
+        Args:
+            topics (List[str]): Topics to generate questions for
             
-            # Human message with the specific topic
-            human_prompt = f"Generate 5 advanced interview questions about {topic} with clear, concise answers."
+        Returns:
+            List[List[Dict]]: Questions for each topic, in the order given
+        """
+        # Duplicate topics would race each other past the cache, so generate each once
+        unique_topics = list(dict.fromkeys(topics))
+        results = await asyncio.gather(*(self.agenerate_interview_questions(t) for t in unique_topics))
+        by_topic = dict(zip(unique_topics, results))
+        return [by_topic[t] for t in topics]
+    
+    async def _agenerate_interview_questions(self, topic: str, difficulty: str = "All",
+                                             fresh: bool = False) -> List[Dict]:
+        """Generate questions on the shared event loop, consulting both cache layers first"""
+        try:
+            seed = await self._redis_io(self._seed_for, topic, fresh)
+            messages, cache_key = self._build_messages(topic, difficulty, seed)
             
-            # Create messages for the chat model
-            messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=human_prompt)
-            ]
+            cached, topic_vector = await self._aget_cached_questions(
+                topic, difficulty, cache_key, semantic=seed == self.seed
+            )
+            if cached is not None:
+                return cached
             
             # Get response from the AI
-            response = self.llm(messages)
+            response = await self._ainvoke_llm(messages, seed)
+            self._record_usage(response.usage_metadata)
             
-            # Parse the response (assuming it returns valid JSON)
-            import json
-            try:
-                questions_data = json.loads(response.content)
-                
-                # Ensure we have exactly 5 questions
-                if len(questions_data) != 5:
-                    # If not exactly 5, create a fallback response
-                    return self._create_fallback_questions(topic)
-                
-                return questions_data
-                
-            except json.JSONDecodeError:
-                # If JSON parsing fails, create fallback questions
+            # JSON mode always returns an object, with the questions under "questions"
+            questions_data = orjson.loads(response.content)["questions"]
+            
+            # Ensure we have exactly 5 questions
+            if len(questions_data) != 5:
+                # If not exactly 5, create a fallback response
                 return self._create_fallback_questions(topic)
-                
+            
+            await self._acache_questions(topic, difficulty, cache_key, topic_vector, questions_data)
+            return questions_data
+            
         except Exception as e:
             print(f"Error generating interview questions: {e}")
             return self._create_fallback_questions(topic)
     
+    async def _astream_interview_questions(self, topic: str, difficulty: str = "All",
+                                           fresh: bool = False) -> AsyncIterator[Dict]:
+        """Yield each question as soon as its JSON object is complete in the streamed reply"""
+        questions_data = []
+        try:
+            seed = await self._redis_io(self._seed_for, topic, fresh)
+            messages, cache_key = self._build_messages(topic, difficulty, seed)
+            
+            cached, topic_vector = await self._aget_cached_questions(
+                topic, difficulty, cache_key, semantic=seed == self.seed
+            )
+            if cached is not None:
+                for question in cached:
+                    yield question
+                return
+            
+            # Incremental parser: completed array items are appended to parsed_items as bytes arrive
+            parsed_items = ijson.sendable_list()
+            parser = ijson.items_coro(parsed_items, "questions.item", use_float=True)
+            
+            # Transient failures are retried only until the first chunk arrives, since
+            # questions already sent can't be taken back
+            chunk, stream = await self._aopen_llm_stream(messages, seed)
+            try:
+                while True:
+                    # The final chunk carries token usage and no content
+                    if chunk.usage_metadata:
+                        self._record_usage(chunk.usage_metadata)
+                    if chunk.content:
+                        parser.send(chunk.content.encode("utf-8"))
+                        for question in parsed_items:
+                            questions_data.append(question)
+                            yield question
+                        del parsed_items[:]
+                    try:
+                        chunk = await stream.__anext__()
+                    except StopAsyncIteration:
+                        break
+            finally:
+                await stream.aclose()
+                _get_llm_semaphore().release()
+            parser.close()
+            
+            if len(questions_data) == 5:
+                await self._acache_questions(topic, difficulty, cache_key, topic_vector, questions_data)
+            elif not questions_data:
+                for question in self._create_fallback_questions(topic):
+                    yield question
+                
+        except Exception as e:
+            print(f"Error streaming interview questions: {e}")
+            # Questions already sent can't be taken back, so only fall back before the first one
+            if not questions_data:
+                for question in self._create_fallback_questions(topic):
+                    yield question
+    
+    def _seed_for(self, topic: str, fresh: bool) -> int:
+        """
+        Return the sampling seed for a topic, moving to the next one when a fresh set is requested
+        
+        The seed stays on its new value, so later identical requests return the fresh set
+        from cache. Offsets live in Redis when available so all workers agree on them.
+        """
+        if self.cache.redis is not None:
+            key = f"smartlife:seed:{hashlib.sha256(topic.encode('utf-8')).hexdigest()}"
+            try:
+                offset = self.cache.redis.incr(key) if fresh else int(self.cache.redis.get(key) or 0)
+                return self.seed + offset
+            except Exception as e:
+                print(f"Error reading seed offset from Redis: {e}")
+        
+        with self._seed_lock:
+            if fresh:
+                self._seed_offsets[topic] = self._seed_offsets.get(topic, 0) + 1
+            return self.seed + self._seed_offsets.get(topic, 0)
+    
+    def _temperature_for(self, seed: int) -> float:
+        """Return the sampling temperature for a seed, nonzero for reseeded (fresh) sets"""
+        return self.temperature if seed == self.seed else self.fresh_temperature
+    
+    def _build_messages(self, topic: str, difficulty: str, seed: int) -> Tuple[List, str]:
+        """
+        Build the chat messages for a topic and the cache key that identifies them
+        
+        Returns:
+            Tuple[List, str]: Messages for the chat model and their cache key
+        """
+        from langchain_core.messages import HumanMessage, SystemMessage
+        
+        # Ask for the requested level directly so no generated questions are thrown away
+        if difficulty == "All":
+            level, levels = "advanced", "Intermediate/Advanced"
+        else:
+            level, levels = difficulty, difficulty
+        
+        # Topic and level go in the human message so the system prompt stays the same for every call
+        human_prompt = HUMAN_PROMPT_TEMPLATE.format(topic=topic, levels=levels, level=level)
+        
+        messages = [
+            SystemMessage(content=SYSTEM_PROMPT_STATIC),
+            HumanMessage(content=human_prompt)
+        ]
+        
+        cache_key = LLMCache.make_key(
+            model=self.model_name,
+            topic=topic,
+            sys=SYSTEM_PROMPT_STATIC,
+            prompt=human_prompt,
+            temp=self._temperature_for(seed),
+            seed=seed
+        )
+        return messages, cache_key
+    
+    async def _aget_cached_questions(self, topic: str, difficulty: str, cache_key: str,
+                                     semantic: bool = True) -> Tuple[Optional[List[Dict]], Optional[np.ndarray]]:
+        """
+        Look up questions in the exact-match cache, then the semantic cache
+        
+        Freshly reseeded sets are specific to their topic, so callers skip the
+        semantic layer for them.
+        
+        Returns:
+            Tuple: Cached questions (None on a miss) and the topic embedding for storing new results
+        """
+        # Return cached questions for a topic that was already generated
+        cached = await self._redis_io(self.cache.get, cache_key)
+        if cached is not None:
+            return cached, None
+        
+        if not semantic:
+            return None, None
+        
+        # Fall back to questions generated for a semantically similar topic
+        topic_vector = await self.semantic_cache.aembed(topic)
+        if topic_vector is not None:
+            cached = await self._redis_io(
+                self.semantic_cache.get, topic_vector, namespace=self._semantic_namespace(difficulty)
+            )
+            if cached is not None:
+                await self._redis_io(self.cache.set, cache_key, cached, ttl=QUESTION_CACHE_TTL)
+        return cached, topic_vector
+    
+    async def _redis_io(self, func, *args, **kwargs):
+        """
+        Run a cache call that may block on Redis without stalling the shared event loop
+        
+        The redis client is synchronous, so with Redis configured the call runs in a
+        worker thread; memory-only caches are fast enough to call directly.
+        """
+        if self.cache.redis is None:
+            return func(*args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args, **kwargs))
+    
+    def _semantic_namespace(self, difficulty: str) -> str:
+        """Semantic cache partition for a difficulty under the current model and prompt"""
+        # Underscore rather than ":" so the value needs no escaping in RediSearch TAG queries
+        return f"{difficulty}_{self._prompt_version}"
+    
+    async def _acache_questions(self, topic: str, difficulty: str, cache_key: str,
+                                topic_vector: Optional[np.ndarray], questions: List[Dict]):
+        """Store freshly generated questions in both cache layers"""
+        await self._redis_io(self.cache.set, cache_key, questions, ttl=QUESTION_CACHE_TTL)
+        if topic_vector is not None:
+            await self._redis_io(
+                self.semantic_cache.set, topic, topic_vector, questions,
+                namespace=self._semantic_namespace(difficulty)
+            )
+    
+    def _record_usage(self, usage: Optional[Dict]):
+        """Count prompt tokens and how many of them OpenAI served from its prompt cache"""
+        if not usage:
+            return
+        cached = (usage.get("input_token_details") or {}).get("cache_read") or 0
+        with self._usage_lock:
+            self._prompt_tokens += usage.get("input_tokens") or 0
+            self._cached_prompt_tokens += cached
+    
+    @_LLM_RETRY
+    async def _ainvoke_llm(self, messages, seed: int):
+        """Call the chat model within the concurrency limit, retrying transient failures"""
+        async with _get_llm_semaphore():
+            return await self.llm.ainvoke(messages, seed=seed, temperature=self._temperature_for(seed))
+    
+    @_LLM_RETRY
+    async def _aopen_llm_stream(self, messages, seed: int):
+        """
+        Start a streamed reply and wait for its first chunk, retrying transient failures
+        
+        Nothing has reached the client before the first chunk, so a failed attempt can
+        simply be repeated. On success the concurrency slot stays taken and the caller
+        must release it once the stream is finished.
+        
+        Returns:
+            Tuple: The first chunk and the stream the remaining chunks are read from
+        """
+        semaphore = _get_llm_semaphore()
+        await semaphore.acquire()
+        stream = self.llm.astream(messages, seed=seed, temperature=self._temperature_for(seed))
+        try:
+            first = await stream.__anext__()
+        except BaseException:
+            await stream.aclose()
+            semaphore.release()
+            raise
+        return first, stream
+    
     def _create_fallback_questions(self, topic: str) -> List[Dict]:
         """
         Create fallback questions if AI generation fails
@@ -99,54 +905,69 @@ class InterviewAI:
         Returns:
             List[Dict]: Fallback questions
         """
-        fallback_questions = [
-            {
-                "question": f"What are the key concepts and principles in {topic}?",
-                "answer": f"The key concepts in {topic} include fundamental principles, best practices, and core methodologies that form the foundation of this field.",
-                "difficulty": "Intermediate"
-            },
-            {
-                "question": f"How would you explain {topic} to someone with no technical background?",
-                "answer": f"I would use analogies and simple language to explain {topic}, focusing on practical benefits and real-world applications.",
-                "difficulty": "Intermediate"
-            },
-            {
-                "question": f"What are the most common challenges when working with {topic}?",
-                "answer": f"Common challenges include complexity management, performance optimization, and maintaining code quality while scaling applications.",
-                "difficulty": "Advanced"
-            },
-            {
-                "question": f"Can you describe a real-world project where you applied {topic}?",
-                "answer": f"In a real-world project, I would apply {topic} by identifying specific use cases, implementing best practices, and measuring success through key metrics.",
-                "difficulty": "Advanced"
-            },
-            {
-                "question": f"What resources would you recommend for someone learning {topic}?",
-                "answer": f"I recommend official documentation, hands-on projects, online courses, and community forums for comprehensive learning of {topic}.",
-                "difficulty": "Intermediate"
-            }
-        ]
-        
-        return fallback_questions
+        # Shallow copy so callers can't reorder or extend the cached list
+        return list(_fallback_questions(topic))
     
-    def get_question_by_difficulty(self, topic: str, difficulty: str = "All") -> List[Dict]:
+    def get_question_by_difficulty(self, topic: str, difficulty: str = "All", fresh: bool = False) -> List[Dict]:
         """
         Get interview questions filtered by difficulty level
         
         Args:
             topic (str): The topic for questions
             difficulty (str): Difficulty level filter ("Beginner", "Intermediate", "Advanced", "All")
+            fresh (bool): Generate a new set instead of the cached one for this topic
             
         Returns:
             List[Dict]: Filtered questions
         """
-        all_questions = self.generate_interview_questions(topic)
+        all_questions = _run_on_llm_loop(self._agenerate_interview_questions(topic, difficulty, fresh))
+        return self._filter_by_difficulty(all_questions, difficulty)
+    
+    async def aget_question_by_difficulty(self, topic: str, difficulty: str = "All",
+                                          fresh: bool = False) -> List[Dict]:
+        """
+        Async version of get_question_by_difficulty
         
+        Args:
+            topic (str): The topic for questions
+            difficulty (str): Difficulty level filter ("Beginner", "Intermediate", "Advanced", "All")
+            fresh (bool): Generate a new set instead of the cached one for this topic
+            
+        Returns:
+            List[Dict]: Filtered questions
+        """
+        all_questions = await _await_on_llm_loop(self._agenerate_interview_questions(topic, difficulty, fresh))
+        return self._filter_by_difficulty(all_questions, difficulty)
+    
+    @staticmethod
+    def _filter_by_difficulty(questions: List[Dict], difficulty: str) -> List[Dict]:
+        """Keep only questions matching the difficulty level"""
         if difficulty == "All":
-            return all_questions
+            return questions
         
-        return [q for q in all_questions if q.get("difficulty", "").lower() == difficulty.lower()]
+        return [q for q in questions if q.get("difficulty", "").lower() == difficulty.lower()]
+
+
+# Global AI instance, created on first use so importing this module needs no API key
+_interview_ai: Optional[InterviewAI] = None
+_interview_ai_lock = threading.Lock()
+
+
+def get_interview_ai() -> InterviewAI:
+    """
+    Return the shared InterviewAI instance, creating it on first use
+    
+    Raises:
+        ValueError: If OPENAI_API_KEY is not set
+    """
+    global _interview_ai
+    if _interview_ai is None:
+        with _interview_ai_lock:
+            if _interview_ai is None:
+                _interview_ai = InterviewAI()
+    return _interview_ai
 
 
-# Global AI instance
-interview_ai = InterviewAI()
+def interview_ai_loaded() -> bool:
+    """Return whether the shared InterviewAI instance has been created yet"""
+    return _interview_ai is not None
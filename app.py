@@ -3,19 +3,80 @@ SmartLife AI - Main Flask Application
 A comprehensive backend with expense tracking and AI-powered interview preparation
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from datetime import datetime
+from functools import wraps
 import os
+import re
+import threading
+import orjson
 from db import db_manager
-from ai import interview_ai
+from ai import get_interview_ai, interview_ai_loaded, prewarm_openai_connection
+
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson for faster request parsing and response serialization"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)  # Keys keep their insertion order
 CORS(app)  # Enable CORS for all routes
 
-# Configuration
-app.config['JSON_SORT_KEYS'] = False
+# Open the OpenAI connection in the background so the first interview request skips the TLS handshake
+prewarm_openai_connection()
+
+# YYYY-MM-DD with a valid month; days 01-28 exist in every month, so only later days need a calendar check
+_DATE_RE = re.compile(r'[0-9]{4}-(?:0[1-9]|1[0-2])-(0[1-9]|1[0-9]|2[0-8]|29|3[01])')
+
+# Upper bound on expenses per bulk insert request
+MAX_BULK_EXPENSES = 1000
+
+# Upper bound on topics per batch request, since each one is a separate OpenAI call
+MAX_BATCH_TOPICS = 10
+
+# Interview requests allowed in flight per process; excess requests get a 503.
+# Kept below the gunicorn thread count (GUNICORN_THREADS, as in the Procfile) so
+# the limit is reached before all threads are busy and expense requests still get one.
+GUNICORN_THREADS = int(os.getenv("GUNICORN_THREADS", "32"))
+INTERVIEW_MAX_INFLIGHT = int(os.getenv("INTERVIEW_MAX_INFLIGHT", str(max(1, GUNICORN_THREADS * 3 // 4))))
+INTERVIEW_QUEUE_TIMEOUT = 2.0
+INTERVIEW_RETRY_AFTER = 5
+_interview_slots = threading.BoundedSemaphore(INTERVIEW_MAX_INFLIGHT)
+
+
+def wants_fresh_questions():
+    """Whether the request asked for a newly generated set via ?fresh=true"""
+    return request.args.get('fresh', '').lower() in ('1', 'true', 'yes')
+
+
+def interview_busy_response():
+    """Response for interview requests rejected by the in-flight limit"""
+    return jsonify({
+        "status": "error",
+        "message": "Too many interview requests in progress, please retry shortly"
+    }), 503, {"Retry-After": str(INTERVIEW_RETRY_AFTER)}
+
+
+def limit_interview_requests(view):
+    """Reject interview requests with 503 instead of queueing them indefinitely"""
+    @wraps(view)
+    async def wrapper(*args, **kwargs):
+        if not _interview_slots.acquire(timeout=INTERVIEW_QUEUE_TIMEOUT):
+            return interview_busy_response()
+        try:
+            return await view(*args, **kwargs)
+        finally:
+            _interview_slots.release()
+    return wrapper
 
 
 @app.route('/', methods=['GET'])
@@ -28,17 +89,85 @@ def health_check():
         "endpoints": {
             "expenses": {
                 "add": "POST /api/expenses",
+                "add_bulk": "POST /api/expenses/bulk",
                 "get_all": "GET /api/expenses"
             },
             "interview": {
-                "generate_questions": "POST /api/interview/questions"
+                "generate_questions": "POST /api/interview/questions",
+                "generate_batch": "POST /api/interview/questions/batch",
+                "stream_questions": "GET /api/interview/questions/stream?topic=..."
             }
-        }
+        },
+        # Report cache counters without loading the AI stack just for a health check
+        "cache": get_interview_ai().cache_stats() if interview_ai_loaded() else None
     })
 
 
 # ==================== EXPENSE TRACKING ENDPOINTS ====================
 
+def is_valid_date(date):
+    """Check a YYYY-MM-DD date, using strptime only when the regex alone can't decide"""
+    if not isinstance(date, str):
+        return False
+    
+    match = _DATE_RE.fullmatch(date)
+    if match and match.group(1) <= '28':
+        return True
+    
+    try:
+        datetime.strptime(date, '%Y-%m-%d')
+        return True
+    except ValueError:
+        return False
+
+
+def validate_expense(data):
+    """
+    Validate and normalize an expense payload
+    
+    Args:
+        data (dict): Expense JSON with amount, category and optional note and date
+        
+    Returns:
+        tuple: (expense fields for the database, None) if valid, otherwise (None, error message)
+    """
+    if not isinstance(data, dict):
+        return None, "Expense must be a JSON object"
+    
+    required_fields = ['amount', 'category']
+    missing_fields = [field for field in required_fields if field not in data]
+    
+    if missing_fields:
+        return None, f"Missing required fields: {', '.join(missing_fields)}"
+    
+    # Validate data types and values
+    try:
+        amount = float(data['amount'])
+        if amount <= 0:
+            return None, "Amount must be greater than 0"
+    except (ValueError, TypeError):
+        return None, "Amount must be a valid number"
+    
+    # Extract and validate optional fields
+    category = str(data['category']).strip()
+    note = str(data.get('note', '')).strip()
+    date = data.get('date')
+    
+    if not category:
+        return None, "Category cannot be empty"
+    
+    # Validate date format if provided
+    if date and not is_valid_date(date):
+        return None, "Date must be in YYYY-MM-DD format"
+    
+    return {
+        "amount": amount,
+        "category": category,
+        "note": note,
+        "date": date
+    }, None
+
+
 @app.route('/api/expenses', methods=['POST'])
 def add_expense():
     """
@@ -62,62 +191,85 @@ def add_expense():
                 "message": "No JSON data provided"
             }), 400
         
-        required_fields = ['amount', 'category']
-        missing_fields = [field for field in required_fields if field not in data]
+        expense_data, error = validate_expense(data)
         
-        if missing_fields:
+        if error:
             return jsonify({
                 "status": "error",
-                "message": f"Missing required fields: {', '.join(missing_fields)}"
+                "message": error
             }), 400
         
-        # Validate data types and values
-        try:
-            amount = float(data['amount'])
-            if amount <= 0:
-                return jsonify({
-                    "status": "error",
-                    "message": "Amount must be greater than 0"
-                }), 400
-        except (ValueError, TypeError):
+        # Add expense to database
+        expense = db_manager.add_expense(**expense_data)
+        
+        return jsonify({
+            "status": "success",
+            "message": "Expense added successfully",
+            "data": expense
+        }), 201
+        
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Internal server error: {str(e)}"
+        }), 500
+
+
+@app.route('/api/expenses/bulk', methods=['POST'])
+def add_expenses_bulk():
+    """
+    Add many expenses in a single database transaction
+    
+    Expected JSON payload (a list of expenses as accepted by POST /api/expenses):
+    [
+        {"amount": 25.50, "category": "Food", "note": "Lunch", "date": "2024-01-15"},
+        {"amount": 15.00, "category": "Transport"}
+    ]
+    
+    Returns:
+    {
+        "status": "success",
+        "data": {
+            "inserted": 2,
+            "first_id": 1,
+            "last_id": 2
+        }
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not isinstance(data, list) or not data:
             return jsonify({
                 "status": "error",
-                "message": "Amount must be a valid number"
+                "message": "Expected a non-empty JSON array of expenses"
             }), 400
         
-        # Extract and validate optional fields
-        category = str(data['category']).strip()
-        note = str(data.get('note', '')).strip()
-        date = data.get('date')
-        
-        if not category:
+        if len(data) > MAX_BULK_EXPENSES:
             return jsonify({
                 "status": "error",
-                "message": "Category cannot be empty"
+                "message": f"At most {MAX_BULK_EXPENSES} expenses can be added at once"
             }), 400
         
-        # Validate date format if provided
-        if date:
-            try:
-                datetime.strptime(date, '%Y-%m-%d')
-            except ValueError:
+        rows = []
+        for index, item in enumerate(data, 1):
+            expense_data, error = validate_expense(item)
+            
+            if error:
                 return jsonify({
                     "status": "error",
-                    "message": "Date must be in YYYY-MM-DD format"
+                    "message": f"Expense {index}: {error}"
                 }), 400
+            
+            rows.append((expense_data['amount'], expense_data['category'],
+                         expense_data['note'], expense_data['date']))
         
-        # Add expense to database
-        expense = db_manager.add_expense(
-            amount=amount,
-            category=category,
-            note=note,
-            date=date
-        )
+        result = db_manager.add_expenses_bulk(rows)
         
         return jsonify({
             "status": "success",
-            "message": "Expense added successfully",
-            "data": expense
+            "message": f"Added {result['inserted']} expenses",
+            "data": result
         }), 201
         
     except Exception as e:
@@ -132,6 +284,10 @@ def get_all_expenses():
     """
     Get all expenses ordered by date (descending)
     
+    Optional query parameters for pagination:
+        limit: maximum number of expenses to return
+        offset: number of expenses to skip (default 0)
+    
     Returns:
     {
         "status": "success",
@@ -148,7 +304,21 @@ def get_all_expenses():
     }
     """
     try:
-        expenses = db_manager.get_all_expenses()
+        limit = request.args.get('limit')
+        offset = request.args.get('offset', '0')
+        
+        try:
+            limit = int(limit) if limit is not None else None
+            offset = int(offset)
+            if (limit is not None and limit < 0) or offset < 0:
+                raise ValueError
+        except ValueError:
+            return jsonify({
+                "status": "error",
+                "message": "Limit and offset must be non-negative integers"
+            }), 400
+        
+        expenses = db_manager.get_all_expenses(limit=limit, offset=offset)
         
         return jsonify({
             "status": "success",
@@ -218,7 +388,8 @@ def delete_expense(expense_id):
 # ==================== INTERVIEW PREPARATION ENDPOINTS ====================
 
 @app.route('/api/interview/questions', methods=['POST'])
-def generate_interview_questions():
+@limit_interview_requests
+async def generate_interview_questions():
     """
     Generate 5 advanced interview questions for a given topic
     
@@ -227,6 +398,8 @@ def generate_interview_questions():
         "topic": "Java OOP"
     }
     
+    Query parameter: fresh=true generates a new set instead of the cached one
+    
     Returns:
     {
         "status": "success",
@@ -263,12 +436,14 @@ def generate_interview_questions():
             }), 400
         
         # Generate interview questions using AI
-        questions = interview_ai.generate_interview_questions(topic)
+        questions = await get_interview_ai().agenerate_interview_questions(topic, fresh=wants_fresh_questions())
         
         return jsonify({
             "status": "success",
             "message": f"Generated 5 interview questions for '{topic}'",
             "topic": topic,
+            # Sent ahead of "data" so streaming clients know the size before the questions
+            "count": len(questions),
             "data": questions
         }), 200
         
@@ -284,8 +459,139 @@ def generate_interview_questions():
         }), 500
 
 
+@app.route('/api/interview/questions/stream', methods=['GET'])
+def stream_interview_questions():
+    """
+    Stream interview questions as Server-Sent Events while they are generated
+    
+    Query parameters:
+        topic: the topic (e.g. /api/interview/questions/stream?topic=Java%20OOP)
+        fresh: "true" to generate a new set instead of the cached one
+    
+    Each question is sent as its own event as soon as it is complete:
+    data: {"question": "...", "answer": "...", "difficulty": "Intermediate"}
+    
+    The stream ends with:
+    event: done
+    data: {"count": 5}
+    """
+    topic = request.args.get('topic', '').strip()
+    
+    if not topic:
+        return jsonify({
+            "status": "error",
+            "message": "Topic is required"
+        }), 400
+    
+    fresh = wants_fresh_questions()
+    
+    try:
+        interview_ai = get_interview_ai()
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    
+    if not _interview_slots.acquire(timeout=INTERVIEW_QUEUE_TIMEOUT):
+        return interview_busy_response()
+    
+    def events():
+        count = 0
+        for question in interview_ai.stream_interview_questions(topic, fresh=fresh):
+            count += 1
+            yield f"data: {app.json.dumps(question)}\n\n"
+        yield f"event: done\ndata: {app.json.dumps({'count': count})}\n\n"
+    
+    response = Response(events(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+    # The slot is held until the stream finishes or the client disconnects
+    response.call_on_close(_interview_slots.release)
+    return response
+
+
+@app.route('/api/interview/questions/batch', methods=['POST'])
+@limit_interview_requests
+async def generate_interview_questions_batch():
+    """
+    Generate interview questions for several topics concurrently
+    
+    Expected JSON payload:
+    {
+        "topics": ["Java OOP", "Machine Learning"]
+    }
+    
+    Returns:
+    {
+        "status": "success",
+        "data": [
+            {
+                "topic": "Java OOP",
+                "questions": [...]
+            }
+        ]
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                "status": "error",
+                "message": "No JSON data provided"
+            }), 400
+        
+        topics = data.get('topics')
+        
+        if not isinstance(topics, list) or not topics:
+            return jsonify({
+                "status": "error",
+                "message": "Topics must be a non-empty list"
+            }), 400
+        
+        if len(topics) > MAX_BATCH_TOPICS:
+            return jsonify({
+                "status": "error",
+                "message": f"At most {MAX_BATCH_TOPICS} topics can be requested at once"
+            }), 400
+        
+        topics = [str(topic).strip() for topic in topics]
+        
+        if not all(topics):
+            return jsonify({
+                "status": "error",
+                "message": "Topics cannot be empty"
+            }), 400
+        
+        # Generate all topics in parallel
+        results = await get_interview_ai().agenerate_many(topics)
+        
+        return jsonify({
+            "status": "success",
+            "message": f"Generated interview questions for {len(topics)} topics",
+            "data": [
+                {"topic": topic, "questions": questions}
+                for topic, questions in zip(topics, results)
+            ]
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Internal server error: {str(e)}"
+        }), 500
+
+
 @app.route('/api/interview/questions/<difficulty>', methods=['POST'])
-def generate_interview_questions_by_difficulty(difficulty):
+@limit_interview_requests
+async def generate_interview_questions_by_difficulty(difficulty):
     """
     Generate interview questions filtered by difficulty level
     
@@ -295,6 +601,7 @@ def generate_interview_questions_by_difficulty(difficulty):
     }
     
     URL parameter: difficulty (Beginner, Intermediate, Advanced)
+    Query parameter: fresh=true generates a new set instead of the cached one
     """
     try:
         data = request.get_json()
@@ -328,13 +635,14 @@ def generate_interview_questions_by_difficulty(difficulty):
             }), 400
         
         # Generate filtered questions
-        questions = interview_ai.get_question_by_difficulty(topic, difficulty)
+        questions = await get_interview_ai().aget_question_by_difficulty(topic, difficulty, fresh=wants_fresh_questions())
         
         return jsonify({
             "status": "success",
             "message": f"Generated interview questions for '{topic}' (Difficulty: {difficulty})",
             "topic": topic,
             "difficulty": difficulty,
+            "count": len(questions),
             "data": questions
         }), 200
         
@@ -391,12 +699,17 @@ if __name__ == '__main__':
     print("Available endpoints:")
     print("  GET  / - Health check")
     print("  POST /api/expenses - Add expense")
+    print("  POST /api/expenses/bulk - Add many expenses at once")
     print("  GET  /api/expenses - Get all expenses")
     print("  GET  /api/expenses/<id> - Get expense by ID")
     print("  DELETE /api/expenses/<id> - Delete expense")
     print("  POST /api/interview/questions - Generate interview questions")
+    print("  POST /api/interview/questions/batch - Generate questions for several topics")
+    print("  GET  /api/interview/questions/stream?topic=... - Stream questions as Server-Sent Events")
     print("  POST /api/interview/questions/<difficulty> - Generate questions by difficulty")
     
-    app.run(debug=True, host="127.0.0.1", port=5000)
+    # Local development server only; production runs under gunicorn (see Procfile).
+    # The debugger and reloader are opt-in because they slow every request.
+    app.run(debug=os.getenv("FLASK_DEBUG", "").lower() in ("1", "true"), host="127.0.0.1", port=5000)
 
 
@@ -5,8 +5,10 @@ Handles SQLite database operations for expense tracking
 
 import sqlite3
 import os
+import atexit
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
 
 class DatabaseManager:
@@ -20,29 +22,80 @@ class DatabaseManager:
             db_path (str): Path to SQLite database file
         """
         self.db_path = db_path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        atexit.register(self.close)
         self.init_database()
     
+    def _get_connection(self) -> sqlite3.Connection:
+        """
+        Get the calling thread's connection, opening it on first use
+        
+        Each thread keeps one connection for its lifetime instead of reconnecting
+        per query. WAL mode lets readers proceed concurrently with a writer.
+        
+        Returns:
+            sqlite3.Connection: Connection in autocommit mode with dict-like rows
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        self._local.conn = conn
+        
+        with self._connections_lock:
+            # Close connections left behind by threads that have exited
+            open_connections = []
+            for thread, thread_conn in self._connections:
+                if thread.is_alive():
+                    open_connections.append((thread, thread_conn))
+                else:
+                    thread_conn.close()
+            open_connections.append((threading.current_thread(), conn))
+            self._connections = open_connections
+        
+        return conn
+    
+    def close(self):
+        """Close all open connections"""
+        with self._connections_lock:
+            for _, conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+    
     def init_database(self):
         """Initialize database and create tables if they don't exist"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Create expenses table
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS expenses (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        amount REAL NOT NULL,
-                        category TEXT NOT NULL,
-                        note TEXT,
-                        date TEXT NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-                conn.commit()
-                print("Database initialized successfully")
-                
+            conn = self._get_connection()
+            
+            # Create expenses table
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS expenses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    amount REAL NOT NULL,
+                    category TEXT NOT NULL,
+                    note TEXT,
+                    date TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Lets the expense list read rows in order instead of sorting the whole table
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_expenses_date_created
+                ON expenses (date DESC, created_at DESC)
+            """)
+            
+            print("Database initialized successfully")
+            
         except sqlite3.Error as e:
             print(f"Error initializing database: {e}")
             raise
@@ -64,59 +117,85 @@ class DatabaseManager:
             date = datetime.now().strftime("%Y-%m-%d")
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
+            cursor = self._get_connection().execute("""
+                INSERT INTO expenses (amount, category, note, date)
+                VALUES (?, ?, ?, ?)
+            """, (amount, category, note, date))
+            
+            return {
+                "id": cursor.lastrowid,
+                "amount": amount,
+                "category": category,
+                "note": note,
+                "date": date
+            }
+            
+        except sqlite3.Error as e:
+            print(f"Error adding expense: {e}")
+            raise
+    
+    def add_expenses_bulk(self, rows: List[Tuple[float, str, str, Optional[str]]]) -> Dict:
+        """
+        Add many expenses in a single transaction
+        
+        Args:
+            rows (List[Tuple]): (amount, category, note, date) tuples; a None date defaults to today
+            
+        Returns:
+            Dict: Number of inserted expenses and the first and last new IDs
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        rows = [
+            (amount, category, note, date if date is not None else today)
+            for amount, category, note, date in rows
+        ]
+        
+        try:
+            conn = self._get_connection()
+            
+            # One transaction means one commit for the whole batch instead of one per row
+            conn.execute("BEGIN")
+            with conn:
+                cursor = conn.executemany("""
                     INSERT INTO expenses (amount, category, note, date)
                     VALUES (?, ?, ?, ?)
-                """, (amount, category, note, date))
-                
-                expense_id = cursor.lastrowid
-                conn.commit()
-                
-                return {
-                    "id": expense_id,
-                    "amount": amount,
-                    "category": category,
-                    "note": note,
-                    "date": date
-                }
-                
+                """, rows)
+                inserted = cursor.rowcount
+                # executemany does not set lastrowid; IDs within one write transaction are consecutive
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            
+            return {
+                "inserted": inserted,
+                "first_id": last_id - inserted + 1 if inserted else None,
+                "last_id": last_id if inserted else None
+            }
+            
         except sqlite3.Error as e:
-            print(f"Error adding expense: {e}")
+            print(f"Error adding expenses: {e}")
             raise
     
-    def get_all_expenses(self) -> List[Dict]:
+    def get_all_expenses(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
         """
         Get all expenses ordered by date (descending)
         
+        Args:
+            limit (int): Maximum number of expenses to return, all if None
+            offset (int): Number of expenses to skip
+            
         Returns:
             List[Dict]: List of all expenses
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT id, amount, category, note, date, created_at
-                    FROM expenses
-                    ORDER BY date DESC, created_at DESC
-                """)
-                
-                expenses = []
-                for row in cursor.fetchall():
-                    expenses.append({
-                        "id": row[0],
-                        "amount": row[1],
-                        "category": row[2],
-                        "note": row[3],
-                        "date": row[4],
-                        "created_at": row[5]
-                    })
-                
-                return expenses
-                
+            # SQLite treats a negative LIMIT as no limit
+            cursor = self._get_connection().execute("""
+                SELECT id, amount, category, note, date, created_at
+                FROM expenses
+                ORDER BY date DESC, created_at DESC
+                LIMIT ? OFFSET ?
+            """, (-1 if limit is None else limit, offset))
+            
+            return [dict(row) for row in cursor.fetchall()]
+            
         except sqlite3.Error as e:
             print(f"Error fetching expenses: {e}")
             raise
@@ -132,27 +211,15 @@ class DatabaseManager:
             Optional[Dict]: Expense data if found, None otherwise
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT id, amount, category, note, date, created_at
-                    FROM expenses
-                    WHERE id = ?
-                """, (expense_id,))
-                
-                row = cursor.fetchone()
-                if row:
-                    return {
-                        "id": row[0],
-                        "amount": row[1],
-                        "category": row[2],
-                        "note": row[3],
-                        "date": row[4],
-                        "created_at": row[5]
-                    }
-                return None
-                
+            cursor = self._get_connection().execute("""
+                SELECT id, amount, category, note, date, created_at
+                FROM expenses
+                WHERE id = ?
+            """, (expense_id,))
+            
+            row = cursor.fetchone()
+            return dict(row) if row else None
+            
         except sqlite3.Error as e:
             print(f"Error fetching expense: {e}")
             raise
@@ -168,14 +235,9 @@ class DatabaseManager:
             bool: True if deleted successfully, False otherwise
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
-                conn.commit()
-                
-                return cursor.rowcount > 0
-                
+            cursor = self._get_connection().execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
+            return cursor.rowcount > 0
+            
         except sqlite3.Error as e:
             print(f"Error deleting expense: {e}")
             raise
@@ -3,216 +3,397 @@ Test script for SmartLife AI Backend
 Demonstrates all API endpoints with example requests
 """
 
-import requests
-import json
+import os
+import sys
+import asyncio
+import argparse
+import functools
 import time
+import orjson
+from cachetools import TTLCache
 
 # Base URL for the API
 BASE_URL = "http://localhost:5000"
 
-def test_health_check():
-    """Test the health check endpoint"""
-    print("🔍 Testing Health Check...")
+# Endpoint paths, relative to BASE_URL
+HEALTH_URL = "/"
+EXPENSES_URL = "/api/expenses"
+BULK_EXPENSES_URL = f"{EXPENSES_URL}/bulk"
+QUESTIONS_URL = "/api/interview/questions"
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Gateway errors and a busy server (503) are retried with exponential backoff,
+# or after the server's Retry-After delay when it sends one
+RETRY_STATUSES = {502, 503, 504}
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 0.2
+
+def retry_delay(response, attempt):
+    """Return how long to wait before retrying a failed response"""
+    retry_after = response.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return float(retry_after)
+    return RETRY_BACKOFF * (2 ** attempt)
+
+# Sync client used by the blocking helpers, created by main() for each run
+SESSION = None
+
+# Sample data used by the tests
+TEST_EXPENSES = [
+    {
+        "amount": 25.50,
+        "category": "Food",
+        "note": "Lunch at restaurant",
+        "date": "2024-01-15"
+    },
+    {
+        "amount": 15.00,
+        "category": "Transport",
+        "note": "Bus fare",
+        "date": "2024-01-16"
+    },
+    {
+        "amount": 200.00,
+        "category": "Shopping",
+        "note": "New clothes",
+        "date": "2024-01-17"
+    }
+]
+
+TEST_TOPICS = [
+    "Python Programming",
+    "Machine Learning",
+    "Web Development"
+]
+
+DIFFICULTIES = ["Beginner", "Intermediate", "Advanced"]
+DIFFICULTY_TOPIC = "Data Structures and Algorithms"
+DIFFICULTY_URLS = {difficulty: f"{QUESTIONS_URL}/{difficulty}" for difficulty in DIFFICULTIES}
+
+# Request bodies are constant, so serialize them once instead of on every POST
+TEST_EXPENSE_BODIES = [orjson.dumps(expense) for expense in TEST_EXPENSES]
+BULK_EXPENSES_BODY = orjson.dumps(TEST_EXPENSES)
+INVALID_EXPENSE_BODY = orjson.dumps({"amount": -10, "category": ""})
+EMPTY_TOPIC_BODY = orjson.dumps({"topic": ""})
+TOPIC_BODIES = {topic: orjson.dumps({"topic": topic}) for topic in TEST_TOPICS + [DIFFICULTY_TOPIC]}
+
+# A passing health check is trusted for 30 seconds when the tests are re-run in one session
+HEALTH_CACHE = TTLCache(maxsize=1, ttl=30)
+
+def create_clients():
+    """
+    Create the sync and async HTTP clients for a test run
+    
+    httpx is imported here rather than at the top so "--help" doesn't pay for it.
+    Both clients reuse pooled keep-alive connections (and share one multiplexed
+    connection when the server speaks HTTP/2) and retry transient server errors.
+    
+    Returns:
+        Tuple: The sync client and the async client
+    """
+    import httpx
+    
+    class RetryTransport(httpx.HTTPTransport):
+        """HTTP transport that retries transient server errors"""
+        
+        def handle_request(self, request):
+            for attempt in range(RETRY_ATTEMPTS + 1):
+                response = super().handle_request(request)
+                if response.status_code not in RETRY_STATUSES or attempt == RETRY_ATTEMPTS:
+                    return response
+                response.close()
+                time.sleep(retry_delay(response, attempt))
+    
+    class AsyncRetryTransport(httpx.AsyncHTTPTransport):
+        """Async HTTP transport that retries transient server errors"""
+        
+        async def handle_async_request(self, request):
+            for attempt in range(RETRY_ATTEMPTS + 1):
+                response = await super().handle_async_request(request)
+                if response.status_code not in RETRY_STATUSES or attempt == RETRY_ATTEMPTS:
+                    return response
+                await response.aclose()
+                await asyncio.sleep(retry_delay(response, attempt))
+    
+    # Interview requests wait on OpenAI, so reads get much longer than the other phases
+    timeout = httpx.Timeout(5.0, read=60.0)
+    
+    # Pool size for each client, large enough that concurrent requests never wait for a connection
+    limits = httpx.Limits(max_connections=32, max_keepalive_connections=32, keepalive_expiry=30)
+    
+    sync_client = httpx.Client(
+        base_url=BASE_URL,
+        timeout=timeout,
+        headers=JSON_HEADERS,
+        transport=RetryTransport(http2=True, limits=limits)
+    )
+    async_client = httpx.AsyncClient(
+        base_url=BASE_URL,
+        timeout=timeout,
+        headers=JSON_HEADERS,
+        transport=AsyncRetryTransport(http2=True, limits=limits)
+    )
+    return sync_client, async_client
+
+# Set VERBOSE=1 to pretty-print response bodies instead of showing them as received
+VERBOSE = os.getenv("VERBOSE") == "1"
+
+def loads(body):
+    """Parse a JSON response body"""
+    return orjson.loads(body)
+
+def pretty(obj):
+    """Serialize an object as indented JSON text"""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+def dump(body):
+    """Return a raw JSON response body for printing, re-indented only in verbose mode"""
+    return pretty(loads(body)) if VERBOSE else body
+
+def write_output(out):
+    """Write a block of buffered output lines to stdout in one call"""
+    sys.stdout.write("\n".join(out) + "\n")
+    sys.stdout.flush()
+
+def test_health_check(force=False):
+    """Test the health check endpoint, unless it passed recently and force is not set"""
+    out = ["🔍 Testing Health Check..."]
     try:
-        response = requests.get(f"{BASE_URL}/")
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-        print("✅ Health check passed\n")
+        if not force and HEALTH_CACHE.get("health"):
+            out.append("✅ Health check passed (cached)\n")
+            return True
+        response = SESSION.get(HEALTH_URL)
+        out.append(f"Status Code: {response.status_code}")
+        out.append(f"Response: {dump(response.text)}")
+        if response.status_code == 200:
+            HEALTH_CACHE["health"] = True
+        out.append("✅ Health check passed\n")
         return True
     except Exception as e:
-        print(f"❌ Health check failed: {e}\n")
+        out.append(f"❌ Health check failed: {e}\n")
         return False
+    finally:
+        write_output(out)
 
-def test_add_expense():
+async def post_one(client, url, body):
+    """POST a serialized JSON body and return the status code and raw response body"""
+    response = await client.post(url, content=body)
+    return response.status_code, response.text
+
+async def test_add_expense(client, out):
     """Test adding expenses"""
-    print("💰 Testing Add Expense...")
-    
-    test_expenses = [
-        {
-            "amount": 25.50,
-            "category": "Food",
-            "note": "Lunch at restaurant",
-            "date": "2024-01-15"
-        },
-        {
-            "amount": 15.00,
-            "category": "Transport",
-            "note": "Bus fare",
-            "date": "2024-01-16"
-        },
-        {
-            "amount": 200.00,
-            "category": "Shopping",
-            "note": "New clothes",
-            "date": "2024-01-17"
-        }
-    ]
-    
-    for i, expense in enumerate(test_expenses, 1):
-        try:
-            response = requests.post(
-                f"{BASE_URL}/api/expenses",
-                json=expense,
-                headers={"Content-Type": "application/json"}
-            )
-            print(f"Expense {i} - Status Code: {response.status_code}")
-            print(f"Response: {json.dumps(response.json(), indent=2)}")
-            print("✅ Expense added successfully\n")
-        except Exception as e:
-            print(f"❌ Failed to add expense {i}: {e}\n")
-
-def test_get_all_expenses():
+    out.append("💰 Testing Add Expense...")
+    
+    # Add all expenses in one bulk request
+    try:
+        status_code, body = await post_one(client, BULK_EXPENSES_URL, BULK_EXPENSES_BODY)
+    except Exception as e:
+        out.append(f"❌ Failed to add expenses: {e}\n")
+        return
+    
+    if status_code != 404:
+        out.append(f"Bulk ({len(TEST_EXPENSES)} expenses) - Status Code: {status_code}")
+        out.append(f"Response: {dump(body)}")
+        out.append("✅ Expenses added successfully\n")
+        return
+    
+    # Older servers without the bulk endpoint: send them individually at once, then report in order
+    results = await asyncio.gather(
+        *[post_one(client, EXPENSES_URL, body) for body in TEST_EXPENSE_BODIES],
+        return_exceptions=True
+    )
+    
+    for i, result in enumerate(results, 1):
+        if isinstance(result, Exception):
+            out.append(f"❌ Failed to add expense {i}: {result}\n")
+            continue
+        status_code, body = result
+        out.append(f"Expense {i} - Status Code: {status_code}")
+        out.append(f"Response: {dump(body)}")
+        out.append("✅ Expense added successfully\n")
+
+@functools.lru_cache(maxsize=128)
+def cached_get(url):
+    """GET an idempotent endpoint once per run and return its status code and raw response body"""
+    response = SESSION.get(url)
+    return response.status_code, response.text
+
+def test_get_all_expenses(out):
     """Test getting all expenses"""
-    print("📋 Testing Get All Expenses...")
+    out.append("📋 Testing Get All Expenses...")
     try:
-        response = requests.get(f"{BASE_URL}/api/expenses")
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-        print("✅ Get all expenses successful\n")
+        status_code, body = cached_get(EXPENSES_URL)
+        out.append(f"Status Code: {status_code}")
+        out.append(f"Response: {dump(body)}")
+        out.append("✅ Get all expenses successful\n")
         return True
     except Exception as e:
-        print(f"❌ Failed to get expenses: {e}\n")
+        out.append(f"❌ Failed to get expenses: {e}\n")
         return False
 
-def test_get_expense_by_id(expense_id):
+def test_get_expense_by_id(expense_id, out):
     """Test getting a specific expense by ID"""
-    print(f"🔍 Testing Get Expense by ID ({expense_id})...")
+    out.append(f"🔍 Testing Get Expense by ID ({expense_id})...")
     try:
-        response = requests.get(f"{BASE_URL}/api/expenses/{expense_id}")
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-        print("✅ Get expense by ID successful\n")
+        status_code, body = cached_get(f"{EXPENSES_URL}/{expense_id}")
+        out.append(f"Status Code: {status_code}")
+        out.append(f"Response: {dump(body)}")
+        out.append("✅ Get expense by ID successful\n")
         return True
     except Exception as e:
-        print(f"❌ Failed to get expense by ID: {e}\n")
+        out.append(f"❌ Failed to get expense by ID: {e}\n")
         return False
 
-def test_interview_questions():
-    """Test generating interview questions"""
-    print("🤖 Testing Interview Questions Generation...")
-    
-    test_topics = [
-        "Python Programming",
-        "Machine Learning",
-        "Web Development"
-    ]
-    
-    for topic in test_topics:
-        try:
-            response = requests.post(
-                f"{BASE_URL}/api/interview/questions",
-                json={"topic": topic},
-                headers={"Content-Type": "application/json"}
-            )
-            print(f"Topic: {topic} - Status Code: {response.status_code}")
-            response_data = response.json()
-            
-            # Show first question as example
-            if response_data.get("status") == "success" and response_data.get("data"):
-                first_question = response_data["data"][0]
-                print(f"Sample Question: {first_question['question']}")
-                print(f"Answer: {first_question['answer']}")
-                print(f"Difficulty: {first_question['difficulty']}")
-            
-            print("✅ Interview questions generated successfully\n")
-        except Exception as e:
-            print(f"❌ Failed to generate questions for {topic}: {e}\n")
-
-def test_interview_questions_by_difficulty():
-    """Test generating interview questions by difficulty"""
-    print("🎯 Testing Interview Questions by Difficulty...")
-    
-    difficulties = ["Beginner", "Intermediate", "Advanced"]
-    topic = "Data Structures and Algorithms"
-    
-    for difficulty in difficulties:
-        try:
-            response = requests.post(
-                f"{BASE_URL}/api/interview/questions/{difficulty}",
-                json={"topic": topic},
-                headers={"Content-Type": "application/json"}
-            )
-            print(f"Difficulty: {difficulty} - Status Code: {response.status_code}")
-            response_data = response.json()
-            
-            if response_data.get("status") == "success":
-                questions = response_data.get("data", [])
-                print(f"Generated {len(questions)} questions for {difficulty} level")
-                if questions:
-                    print(f"Sample: {questions[0]['question']}")
-            
-            print("✅ Difficulty-based questions generated successfully\n")
-        except Exception as e:
-            print(f"❌ Failed to generate {difficulty} questions: {e}\n")
+async def post_for_first_question(client, url, body):
+    """
+    POST a serialized JSON body and parse the response only up to its first question
+    
+    Returns the status code, the top-level "status" and "count" fields, and the
+    first item of "data" (None if there is none). The rest of the body is not read.
+    """
+    import ijson
+    
+    fields = {}
+    events = ijson.sendable_list()
+    parser = ijson.parse_coro(events)
+    builder = None
+    async with client.stream("POST", url, content=body) as response:
+        async for chunk in response.aiter_bytes():
+            parser.send(chunk)
+            for prefix, event, value in events:
+                if prefix in ("status", "count"):
+                    fields[prefix] = value
+                elif prefix == "data.item" and event == "start_map":
+                    builder = ijson.ObjectBuilder()
+                if builder is not None:
+                    builder.event(event, value)
+                    if prefix == "data.item" and event == "end_map":
+                        return response.status_code, fields, builder.value
+            del events[:]
+    return response.status_code, fields, None
 
-def test_error_handling():
-    """Test error handling scenarios"""
-    print("⚠️ Testing Error Handling...")
+async def run_interview(client, kind, topic, difficulty):
+    """POST one interview request to the general or the per-difficulty endpoint"""
+    url = DIFFICULTY_URLS[difficulty] if kind == "difficulty" else QUESTIONS_URL
+    return await post_for_first_question(client, url, TOPIC_BODIES[topic])
+
+async def test_interview_preparation(client, out):
+    """Test generating interview questions, overall and by difficulty, in one concurrent batch"""
+    # All six requests are independent, so send them together and report afterwards
+    tasks = [("questions", t, None) for t in TEST_TOPICS] + [("difficulty", DIFFICULTY_TOPIC, d) for d in DIFFICULTIES]
+    results = await asyncio.gather(*[run_interview(client, *task) for task in tasks], return_exceptions=True)
+    topic_results = results[:len(TEST_TOPICS)]
+    difficulty_results = results[len(TEST_TOPICS):]
     
-    # Test invalid expense data
-    print("Testing invalid expense data...")
-    try:
-        response = requests.post(
-            f"{BASE_URL}/api/expenses",
-            json={"amount": -10, "category": ""},  # Invalid data
-            headers={"Content-Type": "application/json"}
-        )
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-    except Exception as e:
-        print(f"Error: {e}")
+    out.append("🤖 Testing Interview Questions Generation...")
     
-    # Test non-existent expense
-    print("\nTesting non-existent expense...")
-    try:
-        response = requests.get(f"{BASE_URL}/api/expenses/999")
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-    except Exception as e:
-        print(f"Error: {e}")
+    for topic, result in zip(TEST_TOPICS, topic_results):
+        if isinstance(result, Exception):
+            out.append(f"❌ Failed to generate questions for {topic}: {result}\n")
+            continue
+        status_code, response_data, first_question = result
+        out.append(f"Topic: {topic} - Status Code: {status_code}")
+        
+        # Show first question as example
+        if response_data.get("status") == "success" and first_question:
+            out.append(f"Sample Question: {first_question['question']}")
+            out.append(f"Answer: {first_question['answer']}")
+            out.append(f"Difficulty: {first_question['difficulty']}")
+        
+        out.append("✅ Interview questions generated successfully\n")
     
-    # Test invalid interview topic
-    print("\nTesting invalid interview topic...")
-    try:
-        response = requests.post(
-            f"{BASE_URL}/api/interview/questions",
-            json={"topic": ""},  # Empty topic
-            headers={"Content-Type": "application/json"}
-        )
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-    except Exception as e:
-        print(f"Error: {e}")
+    out.append("🎯 Testing Interview Questions by Difficulty...")
     
-    print("✅ Error handling tests completed\n")
+    for difficulty, result in zip(DIFFICULTIES, difficulty_results):
+        if isinstance(result, Exception):
+            out.append(f"❌ Failed to generate {difficulty} questions: {result}\n")
+            continue
+        status_code, response_data, first_question = result
+        out.append(f"Difficulty: {difficulty} - Status Code: {status_code}")
+        
+        if response_data.get("status") == "success":
+            out.append(f"Generated {response_data.get('count', 0)} questions for {difficulty} level")
+            if first_question:
+                out.append(f"Sample: {first_question['question']}")
+        
+        out.append("✅ Difficulty-based questions generated successfully\n")
 
-def main():
-    """Run all tests"""
-    print("🚀 Starting SmartLife AI Backend Tests")
-    print("=" * 50)
+async def get_one(client, url):
+    """GET a URL and return the status code and raw response body"""
+    response = await client.get(url)
+    return response.status_code, response.text
+
+async def test_error_handling(client, out):
+    """Test error handling scenarios"""
+    out.append("⚠️ Testing Error Handling...")
     
-    # Check if server is running
-    if not test_health_check():
-        print("❌ Server is not running. Please start the server with: python app.py")
-        return
+    # The three failure cases are independent, so send them together
+    cases = (
+        ("Testing invalid expense data...", post_one(client, EXPENSES_URL, INVALID_EXPENSE_BODY)),
+        ("Testing non-existent expense...", get_one(client, f"{EXPENSES_URL}/999")),
+        ("Testing invalid interview topic...", post_one(client, QUESTIONS_URL, EMPTY_TOPIC_BODY))
+    )
+    results = await asyncio.gather(*[request for _, request in cases], return_exceptions=True)
+    
+    # Report in a fixed order regardless of which response arrived first
+    for i, ((title, _), result) in enumerate(zip(cases, results)):
+        out.append(title if i == 0 else f"\n{title}")
+        if isinstance(result, Exception):
+            out.append(f"Error: {result}")
+            continue
+        status_code, body = result
+        out.append(f"Status Code: {status_code}")
+        out.append(f"Response: {dump(body)}")
+    
+    out.append("✅ Error handling tests completed\n")
+
+async def run_sync(func, *args):
+    """Run a blocking test helper in a worker thread so the other phases keep going"""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+async def expense_phase(client):
+    """Test expense tracking"""
+    out = ["💰 Testing Expense Tracking Features", "-" * 30]
+    # Reads run after the add so they see the new expenses
+    await test_add_expense(client, out)
+    await run_sync(test_get_all_expenses, out)
+    await run_sync(test_get_expense_by_id, 1, out)
+    write_output(out)
+
+async def interview_phase(client):
+    """Test interview preparation"""
+    out = ["🤖 Testing Interview Preparation Features", "-" * 30]
+    await test_interview_preparation(client, out)
+    write_output(out)
+
+async def error_phase(client):
+    """Test error handling"""
+    out = ["⚠️ Testing Error Handling", "-" * 30]
+    await test_error_handling(client, out)
+    write_output(out)
+
+async def main(force_health=False):
+    """Run all tests"""
+    global SESSION
     
-    # Test expense tracking
-    print("💰 Testing Expense Tracking Features")
-    print("-" * 30)
-    test_add_expense()
-    test_get_all_expenses()
-    test_get_expense_by_id(1)
+    # Start from an empty GET cache so each run hits the server at least once
+    cached_get.cache_clear()
     
-    # Test interview preparation
-    print("🤖 Testing Interview Preparation Features")
-    print("-" * 30)
-    test_interview_questions()
-    test_interview_questions_by_difficulty()
+    print("🚀 Starting SmartLife AI Backend Tests")
+    print("=" * 50)
     
-    # Test error handling
-    print("⚠️ Testing Error Handling")
-    print("-" * 30)
-    test_error_handling()
+    SESSION, client = create_clients()
+    with SESSION:
+        async with client:
+            # Check if server is running
+            if not test_health_check(force=force_health):
+                print("❌ Server is not running. Please start the server with: python app.py")
+                return
+            
+            # The phases don't depend on each other, so they run concurrently over one connection pool;
+            # each buffers its output and writes it as one block when it finishes
+            await asyncio.gather(expense_phase(client), interview_phase(client), error_phase(client))
     
     print("🎉 All tests completed!")
     print("\n📝 Example cURL commands:")
@@ -224,4 +405,9 @@ def main():
     print('curl -X POST http://localhost:5000/api/interview/questions -H "Content-Type: application/json" -d \'{"topic": "Python Programming"}\'')
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Run the SmartLife AI Backend API tests")
+    parser.add_argument("--force-health", action="store_true",
+                        help="query the health endpoint even if it passed recently")
+    args = parser.parse_args()
+    
+    asyncio.run(main(force_health=args.force_health))